@@ -3,25 +3,40 @@
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional
+from contextlib import aclosing
+import os
+import asyncio
 import core
 import json
-import asyncio
+import orjson
 
 app = FastAPI(
     title="Subdomain Enumerator API",
     description="Fast subdomain enumeration API with passive and active scanning",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS for React frontend
+# FRONTEND_URL: comma-separated allowed origins (unset = any origin).
+# No credentials (the API uses no cookies, and "*" forbids them anyway);
+# preflights are cached for a day. WebSocket and Origin-less requests such
+# as /health probes pass through this middleware untouched.
+FRONTEND_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("FRONTEND_URL", "*").split(",")
+    if origin.strip()
+]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your React app's URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=FRONTEND_ORIGINS,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
+    max_age=86400,
 )
 
 
@@ -32,7 +47,8 @@ class EnumerateRequest(BaseModel):
     custom_wordlist: Optional[str] = Field(None, description="Path to custom wordlist")
     passive: bool = Field(False, description="Enable passive enumeration via crt.sh")
     timeout: float = Field(5.0, description="DNS timeout in seconds", ge=0.1, le=30.0)
-    threads: int = Field(30, description="Number of concurrent threads", ge=1, le=100)
+    threads: int = Field(30, description="Concurrency factor (threads * 10 DNS queries in flight)", ge=1, le=100)
+    detect_wildcard: bool = Field(True, description="Filter out hits that only resolve to wildcard DNS IPs")
 
 
 class SubdomainResult(BaseModel):
@@ -115,7 +131,8 @@ async def passive_enumerate(request: PassiveRequest):
     without performing active DNS queries.
     """
     try:
-        subdomains = core.fetch_crtsh_subdomains(request.domain)
+        # Blocking download; keep it off the event loop running the DNS sweeps
+        subdomains = await asyncio.to_thread(core.fetch_crtsh_subdomains, request.domain)
         return {
             "count": len(subdomains),
             "subdomains": subdomains
@@ -138,21 +155,25 @@ async def enumerate(request: EnumerateRequest):
             raise HTTPException(status_code=400, detail="Domain is required")
         
         # Run enumeration
-        result = core.enumerate_subdomains(
+        result = await core.aenumerate_subdomains(
             domain=request.domain,
             wordlist_path=request.custom_wordlist,
             preset_id=request.wordlist_preset,
             passive=request.passive,
             timeout=request.timeout,
-            threads=request.threads
+            threads=request.threads,
+            detect_wildcard=request.detect_wildcard
         )
         
-        return {
+        # core already returns plain dicts in the response shape, so hand them
+        # straight to orjson instead of re-validating every entry through
+        # EnumerateResponse (which still documents the schema)
+        return ORJSONResponse({
             "count": result["count"],
             "live_web_services": result["live_web_services"],
             "dns_only": result["dns_only"],
             "elapsed_time": result["elapsed_time"]
-        }
+        })
     
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -162,6 +183,11 @@ async def enumerate(request: EnumerateRequest):
         raise HTTPException(status_code=500, detail=f"Enumeration failed: {str(e)}")
 
 
+async def send_message(websocket: WebSocket, message: dict):
+    """Send a JSON message as a text frame, encoded with orjson"""
+    await websocket.send_text(orjson.dumps(message).decode())
+
+
 @app.websocket("/ws/enumerate")
 async def websocket_enumerate(websocket: WebSocket):
     """
@@ -173,7 +199,7 @@ async def websocket_enumerate(websocket: WebSocket):
     - Completion message with total count and elapsed time
     
     Message format:
-    Input: {"domain": "example.com", "wordlist_preset": "1", "passive": false, "timeout": 5.0, "threads": 30}
+    Input: {"domain": "example.com", "wordlist_preset": "1", "passive": false, "timeout": 5.0, "threads": 30, "detect_wildcard": true}
     
     Output messages:
     - Progress: {"type": "progress", "percentage": 45.5, "completed": 455, "total": 1000}
@@ -187,104 +213,52 @@ async def websocket_enumerate(websocket: WebSocket):
     try:
         # Receive enumeration parameters
         data = await websocket.receive_text()
-        params = json.loads(data)
+        params = orjson.loads(data)
         
         domain = params.get("domain")
         if not domain:
-            await websocket.send_json({
+            await send_message(websocket, {
                 "type": "error",
                 "message": "Domain is required"
             })
             await websocket.close()
             return
         
-        wordlist_preset = params.get("wordlist_preset", "1")
-        custom_wordlist = params.get("custom_wordlist")
-        passive = params.get("passive", False)
-        timeout = params.get("timeout", 5.0)
-        threads = params.get("threads", 30)
-        
-        # Create a thread-safe queue for real-time message streaming
-        message_queue = asyncio.Queue()
-        enumeration_complete = asyncio.Event()
-        
-        # Run enumeration in a thread pool
-        def run_enumeration():
-            def sync_progress_callback(percentage, completed, total):
-                # Put message in queue for async sending
-                asyncio.run_coroutine_threadsafe(
-                    message_queue.put({
-                        "type": "progress",
-                        "percentage": round(percentage, 2),
-                        "completed": completed,
-                        "total": total
-                    }),
-                    loop
-                )
-            
-            def sync_http_validation_callback(result):
-                # Put HTTP validation message in queue
-                asyncio.run_coroutine_threadsafe(
-                    message_queue.put(result),
-                    loop
-                )
-            
-            try:
-                result = core.enumerate_subdomains(
-                    domain=domain,
-                    wordlist_path=custom_wordlist,
-                    preset_id=wordlist_preset,
-                    passive=passive,
-                    timeout=timeout,
-                    threads=threads,
-                    progress_callback=sync_progress_callback,
-                    http_validation_callback=sync_http_validation_callback
-                )
-                
-                # Signal completion
-                asyncio.run_coroutine_threadsafe(
-                    message_queue.put({
-                        "type": "complete",
-                        "count": result["count"],
-                        "elapsed_time": round(result["elapsed_time"], 2)
-                    }),
-                    loop
-                )
-            except Exception as e:
-                asyncio.run_coroutine_threadsafe(
-                    message_queue.put({
-                        "type": "error",
-                        "message": str(e)
-                    }),
-                    loop
+        # Same defaults and bounds as POST /api/enumerate
+        try:
+            request = EnumerateRequest(**params)
+        except ValidationError as e:
+            await send_message(websocket, {
+                "type": "error",
+                "message": "Invalid parameters: " + "; ".join(
+                    f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
                 )
-            finally:
-                # Set the event directly (it's not a coroutine)
-                loop.call_soon_threadsafe(enumeration_complete.set)
-        
-        # Start enumeration in background thread
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(None, run_enumeration)
+            })
+            await websocket.close()
+            return
         
-        # Stream messages in real-time as they arrive
-        while not enumeration_complete.is_set() or not message_queue.empty():
-            try:
-                # Wait for message with timeout to check completion status
-                message = await asyncio.wait_for(message_queue.get(), timeout=0.1)
-                await websocket.send_json(message)
-                
-                # Break if this was the completion or error message
-                if message["type"] in ["complete", "error"]:
-                    break
-            except asyncio.TimeoutError:
-                # No message available, continue waiting
-                continue
+        stream = core.aenumerate_subdomains_stream(
+            domain=request.domain,
+            wordlist_path=request.custom_wordlist,
+            preset_id=request.wordlist_preset,
+            passive=request.passive,
+            timeout=request.timeout,
+            threads=request.threads,
+            detect_wildcard=request.detect_wildcard
+        )
+        # aclosing() cancels in-flight DNS/HTTP work if the client goes away
+        async with aclosing(stream):
+            async for message in stream:
+                # Discoveries are reported once HTTP validation classifies them
+                if message["type"] == "subdomain":
+                    continue
+                await send_message(websocket, message)
         
     except WebSocketDisconnect:
         pass
     except json.JSONDecodeError:
         try:
-            await websocket.send_json({
+            await send_message(websocket, {
                 "type": "error",
                 "message": "Invalid JSON format"
             })
@@ -292,7 +266,7 @@ async def websocket_enumerate(websocket: WebSocket):
             pass
     except Exception as e:
         try:
-            await websocket.send_json({
+            await send_message(websocket, {
                 "type": "error",
                 "message": str(e)
             })
@@ -313,4 +287,19 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+
+    # uvloop is not available on Windows; fall back to the stock asyncio loop
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+
+    uvicorn.run(
+        "api:app",
+        host="0.0.0.0",
+        port=8000,
+        loop=loop,
+        http="httptools",
+        workers=os.cpu_count()
+    )
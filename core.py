@@ -2,12 +2,17 @@
 # core.py - Core subdomain enumeration logic
 
 import dns.resolver
-import concurrent.futures
+import dns.asyncresolver
 import time
 import os
+import functools
 import requests
+import ijson
 import asyncio
 import http_validator
+from uuid import uuid4
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
 
 PRESET_NAMES = {
     "1": ("top1k", "top1k.txt"),
@@ -18,6 +23,26 @@ PRESET_NAMES = {
     "6": ("custom", None)
 }
 
+# Shared resolver for active enumeration. Explicit upstreams with no search
+# list / ndots expansion mean exactly one query per candidate name, and the
+# cache is shared by every enumeration this process runs.
+_RESOLVER = dns.asyncresolver.Resolver(configure=False)
+_RESOLVER.nameservers = ['1.1.1.1', '8.8.8.8', '9.9.9.9']
+_RESOLVER.search = []
+_RESOLVER.ndots = 0
+_RESOLVER.cache = dns.resolver.LRUCache(100000)
+
+# Process-wide host -> result cache shared by every request in this worker.
+# Answers and definitive negatives (NXDOMAIN / no A record) live for 5
+# minutes, so repeat scans of a domain skip the network entirely. Only
+# touched from the event loop, so it needs no lock.
+_DNS_CACHE = TTLCache(maxsize=200_000, ttl=300)
+_CACHE_MISS = object()
+
+# Shared crt.sh session so repeated passive lookups reuse TLS connections
+_CRTSH = requests.Session()
+_CRTSH.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
 
 def fetch_crtsh_subdomains(domain):
     """
@@ -30,69 +55,121 @@ def fetch_crtsh_subdomains(domain):
         List of discovered subdomains
     """
     url = f"https://crt.sh/?q=%25.{domain}&output=json"
+    suffix = '.' + domain
     
     try:
-        r = requests.get(url, timeout=10)
-        if r.status_code != 200:
-            return []
-        data = r.json()
-
-        subs = set()
-        for entry in data:
-            name = entry.get("name_value")
-            if not name:
-                continue
-            for s in name.split("\n"):
-                s = s.strip().lower()
-                if "*" in s:
-                    s = s.replace("*.", "")
-                if s.endswith(domain):
-                    subs.add(s)
+        with _CRTSH.get(url, stream=True, timeout=10) as r:
+            if r.status_code != 200:
+                return []
+            # Parse the (often huge) JSON array incrementally off the socket
+            r.raw.decode_content = True
+
+            subs = set()
+            for name in ijson.items(r.raw, 'item.name_value'):
+                if not name:
+                    continue
+                for s in name.split("\n"):
+                    s = s.strip().lower().removeprefix("*.")
+                    if s == domain or s.endswith(suffix):
+                        subs.add(s)
         return list(subs)
     except Exception as e:
         return []
 
 
-def resolve_a(host, timeout):
+def _cached_lookup(host):
+    """Return the cached resolution for host, or _CACHE_MISS"""
+    return _DNS_CACHE.get(host, _CACHE_MISS)
+
+
+def _cache_store(host, result):
+    """Cache a resolution result (None records a definitive negative)"""
+    _DNS_CACHE[host] = result
+
+
+async def aresolve_a(resolver, host, timeout):
     """
-    Resolve A records for a host
+    Resolve A records for a host on the running event loop
     
     Args:
+        resolver: dns.asyncresolver.Resolver instance
         host: Hostname to resolve
         timeout: DNS timeout in seconds
         
     Returns:
         Dict with host and IPs, or None if resolution fails
     """
+    hit = _cached_lookup(host)
+    if hit is not _CACHE_MISS:
+        return hit
     try:
-        answers = dns.resolver.resolve(host, 'A', lifetime=timeout)
-        ips = [r.to_text() for r in answers]
-        return {"host": host, "ips": ips}
-    except:
+        answers = await resolver.resolve(host, 'A', lifetime=timeout, search=False)
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        _cache_store(host, None)
+        return None
+    except Exception:
+        # Timeouts / SERVFAIL are not cached so the next run retries them
         return None
+    result = {"host": host, "ips": [r.to_text() for r in answers]}
+    _cache_store(host, result)
+    return result
+
+
+async def adetect_wildcard_ips(domain, timeout, probes=3):
+    """
+    Detect wildcard DNS by resolving random labels that should not exist
+    
+    Args:
+        domain: Normalized target domain
+        timeout: DNS timeout in seconds
+        probes: Number of random labels to try
+        
+    Returns:
+        Set of IPs the wildcard answers with (empty if there is no wildcard)
+    """
+    async def probe():
+        # Straight to the resolver: these random names are never looked up
+        # again, so storing them in _DNS_CACHE would only evict real entries
+        try:
+            answers = await _RESOLVER.resolve(f"{uuid4().hex}.{domain}", 'A',
+                                              lifetime=timeout, search=False)
+        except Exception:
+            return []
+        return [r.to_text() for r in answers]
+    
+    wildcard_ips = set()
+    for ips in await asyncio.gather(*(probe() for _ in range(probes))):
+        wildcard_ips.update(ips)
+    return wildcard_ips
 
 
-def worker(prefix, domain, timeout):
-    """Worker function for concurrent subdomain resolution"""
-    host = f"{prefix}.{domain}".strip().lower()
-    return resolve_a(host, timeout)
+@functools.lru_cache(maxsize=8)
+def _load_wordlist_cached(path, mtime):
+    """Parse a wordlist once per (path, mtime); returns an immutable tuple"""
+    # Decode, lowercase and split the whole file in single C-level passes
+    # instead of iterating it line by line through the text-mode reader
+    with open(path, 'rb') as f:
+        text = f.read().decode('utf-8', 'ignore').lower()
+    return tuple(l for l in map(str.strip, text.splitlines()) if l and l[0] != '#')
 
 
 def load_wordlist(path):
     """
     Load wordlist from file
     
+    Parsed wordlists are cached in memory; replacing or editing the file
+    changes its mtime and invalidates the cached copy.
+    
     Args:
         path: Path to wordlist file
         
     Returns:
-        List of prefixes
+        List of lowercased prefixes
     """
     if not os.path.isfile(path):
         raise FileNotFoundError(f"Wordlist not found: {path}")
-    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-        lines = [l.strip() for l in f if l.strip() and not l.startswith('#')]
-    return lines
+    path = os.path.abspath(path)
+    return list(_load_wordlist_cached(path, os.path.getmtime(path)))
 
 
 def get_preset_path(preset_id):
@@ -113,28 +190,151 @@ def get_preset_path(preset_id):
 def enumerate_subdomains(domain, wordlist_path=None, preset_id="1", 
                         passive=False, timeout=5.0, threads=30, 
                         progress_callback=None, subdomain_callback=None,
-                        http_validation_callback=None):
+                        http_validation_callback=None, detect_wildcard=True):
     """
     Main subdomain enumeration function
     
+    Blocking wrapper around aenumerate_subdomains() for synchronous callers
+    such as the CLI. Must not be called from a running event loop.
+    
+    Args:
+        domain: Target domain
+        wordlist_path: Path to custom wordlist (optional)
+        preset_id: Preset wordlist ID (1-6)
+        passive: Enable passive enumeration via crt.sh
+        timeout: DNS timeout in seconds
+        threads: Concurrency factor (threads * 10 DNS queries in flight)
+        progress_callback: Optional callback function for progress updates (percentage, completed, total)
+        subdomain_callback: Optional callback function called when a subdomain is discovered
+        http_validation_callback: Optional callback function called when HTTP validation completes for a subdomain
+        detect_wildcard: Drop results that only point at the domain's wildcard DNS IPs
+        
+    Returns:
+        Same dict as aenumerate_subdomains()
+    """
+    return asyncio.run(aenumerate_subdomains(
+        domain,
+        wordlist_path=wordlist_path,
+        preset_id=preset_id,
+        passive=passive,
+        timeout=timeout,
+        threads=threads,
+        progress_callback=progress_callback,
+        subdomain_callback=subdomain_callback,
+        http_validation_callback=http_validation_callback,
+        detect_wildcard=detect_wildcard
+    ))
+
+
+async def aenumerate_subdomains(domain, wordlist_path=None, preset_id="1", 
+                               passive=False, timeout=5.0, threads=30, 
+                               progress_callback=None, subdomain_callback=None,
+                               http_validation_callback=None, detect_wildcard=True):
+    """
+    Async subdomain enumeration
+    
+    Collects the messages of aenumerate_subdomains_stream() into a single
+    result and forwards them to the optional callbacks.
+    
     Args:
         domain: Target domain
         wordlist_path: Path to custom wordlist (optional)
         preset_id: Preset wordlist ID (1-6)
         passive: Enable passive enumeration via crt.sh
         timeout: DNS timeout in seconds
-        threads: Number of concurrent threads
+        threads: Concurrency factor (threads * 10 DNS queries in flight)
         progress_callback: Optional callback function for progress updates (percentage, completed, total)
         subdomain_callback: Optional callback function called when a subdomain is discovered
         http_validation_callback: Optional callback function called when HTTP validation completes for a subdomain
+        detect_wildcard: Drop results that only point at the domain's wildcard DNS IPs
         
     Returns:
         Dict with results: {
-            "subdomains": [{"host": str, "ips": [str]}],
+            "live_web_services": [{"subdomain": str, "url": str, "status": int, "ips": [str]}],
+            "dns_only": [{"subdomain": str, "ips": [str]}],
             "count": int,
             "elapsed_time": float
         }
     """
+    live_web_services = []
+    dns_only = []
+    count = 0
+    elapsed = 0.0
+    
+    async for message in aenumerate_subdomains_stream(
+        domain,
+        wordlist_path=wordlist_path,
+        preset_id=preset_id,
+        passive=passive,
+        timeout=timeout,
+        threads=threads,
+        detect_wildcard=detect_wildcard
+    ):
+        kind = message["type"]
+        if kind == "progress":
+            if progress_callback:
+                progress_callback(message["percentage"], message["completed"], message["total"])
+        elif kind == "subdomain":
+            if subdomain_callback:
+                subdomain_callback({"host": message["host"], "ips": message["ips"]})
+        elif kind == "http_validated":
+            live_web_services.append({
+                "subdomain": message["subdomain"],
+                "url": message["url"],
+                "status": message["status"],
+                "ips": message["ips"]
+            })
+            if http_validation_callback:
+                http_validation_callback(message)
+        elif kind == "dns_only":
+            dns_only.append({
+                "subdomain": message["subdomain"],
+                "ips": message["ips"]
+            })
+            if http_validation_callback:
+                http_validation_callback(message)
+        elif kind == "complete":
+            count = message["count"]
+            elapsed = message["elapsed_time"]
+    
+    return {
+        "live_web_services": live_web_services,
+        "dns_only": dns_only,
+        "count": count,
+        "elapsed_time": elapsed
+    }
+
+
+async def aenumerate_subdomains_stream(domain, wordlist_path=None, preset_id="1", 
+                                       passive=False, timeout=5.0, threads=30,
+                                       detect_wildcard=True):
+    """
+    Async subdomain enumeration, streamed as typed messages
+    
+    All DNS queries share one event loop; at most threads * 10 of them are
+    in flight at any time. Each discovered subdomain is HTTP-validated as
+    soon as it resolves, while the rest of the sweep continues.
+    
+    Args:
+        domain: Target domain
+        wordlist_path: Path to custom wordlist (optional)
+        preset_id: Preset wordlist ID (1-6)
+        passive: Enable passive enumeration via crt.sh
+        timeout: DNS timeout in seconds
+        threads: Concurrency factor (threads * 10 DNS queries in flight)
+        detect_wildcard: Drop results that only point at the domain's wildcard DNS IPs
+        
+    Yields:
+        Message dicts, in the order they happen:
+        - {"type": "progress", "percentage": float, "completed": int, "total": int}
+        - {"type": "subdomain", "host": str, "ips": [str]}
+        - {"type": "http_validated", "subdomain": str, "url": str, "status": int, "ips": [str]}
+        - {"type": "dns_only", "subdomain": str, "ips": [str]}
+        - {"type": "complete", "count": int, "elapsed_time": float}
+    """
+    if threads < 1:
+        raise ValueError("threads must be at least 1")
+    
     # Normalize domain
     try:
         domain_ascii = domain.encode('idna').decode('ascii')
@@ -153,70 +353,93 @@ def enumerate_subdomains(domain, wordlist_path=None, preset_id="1",
         else:
             raise ValueError("Invalid preset or wordlist path")
     
-    # Add passive enumeration results
+    # Build every hostname up front; prefixes are already stripped and
+    # lowercased by load_wordlist()
+    domain_dot = '.' + domain
+    hosts = [p + domain_dot for p in prefixes if p]
+    
+    # Add passive enumeration results. crt.sh returns full hostnames, so they
+    # are resolved as-is (multi-label names like a.b.example.com included)
     if passive:
-        passive_subs = fetch_crtsh_subdomains(domain)
-        extracted = []
-        for sub in passive_subs:
-            if sub.endswith(domain):
-                prefix = sub.replace(f".{domain}", "")
-                if prefix and prefix != domain:
-                    extracted.append(prefix)
-        prefixes = list(set(prefixes + extracted))
+        passive_subs = await asyncio.to_thread(fetch_crtsh_subdomains, domain)
+        hosts.extend(s for s in passive_subs if s.endswith(domain_dot))
+        hosts = list(dict.fromkeys(hosts))
     
-    total_prefixes = len(prefixes)
+    total_prefixes = len(hosts)
     
     # Active enumeration
     results = []
     completed = 0
-    last_reported_percentage = -5  # Track last reported percentage to send every 5%
+    # Report roughly every 5% of the sweep, decided with one integer modulo
+    step = max(total_prefixes // 20, 1)
     start = time.time()
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as ex:
-        futures = {ex.submit(worker, pfx, domain, timeout): pfx for pfx in prefixes}
-        for fut in concurrent.futures.as_completed(futures):
-            try:
-                res = fut.result()
-            except:
-                res = None
-            
-            completed += 1
-            
-            # Send progress update every 5% or at completion
-            # DNS phase is 0-50% of total progress
-            if progress_callback:
-                dns_percentage = (completed / total_prefixes) * 50  # DNS is first 50%
-                # Send if we've crossed a 5% threshold
-                if dns_percentage >= last_reported_percentage + 5 or completed == total_prefixes:
-                    progress_callback(dns_percentage, completed, total_prefixes * 2)  # total * 2 for both phases
-                    last_reported_percentage = dns_percentage
-            
-            # Collect results (no callback here anymore)
-            if res:
-                results.append(res)
-                if subdomain_callback:
-                    subdomain_callback(res)
+    # With a wildcard record every prefix "resolves"; remember what the
+    # wildcard answers with so those hits never reach HTTP validation
+    wildcard_ips = await adetect_wildcard_ips(domain, timeout) if detect_wildcard else set()
     
-    elapsed = time.time() - start
+    semaphore = asyncio.Semaphore(threads * 10)
     
-    # Perform HTTP/HTTPS validation with progress tracking
-    # HTTP validation is 50-100% of total progress
-    def http_progress_wrapper(result):
-        # This gets called for each validated subdomain
-        if http_validation_callback:
-            http_validation_callback(result)
-    
-    validation_result = asyncio.run(
-        http_validator.validate_subdomains(
-            results, 
-            http_progress_wrapper,
-            progress_callback  # Pass progress callback for HTTP validation phase
-        )
-    )
+    async def resolve_bounded(host):
+        async with semaphore:
+            return await aresolve_a(_RESOLVER, host, timeout)
     
-    return {
-        "live_web_services": validation_result["live_web_services"],
-        "dns_only": validation_result["dns_only"],
+    # DNS and HTTP run as one pipeline: each host's HTTP probe starts as soon
+    # as it resolves, so total time is roughly max(dns, http) instead of the
+    # sum. Finished tasks of both kinds land on one queue in completion order.
+    finished = asyncio.Queue()
+    tasks = []
+    host_ips = {}
+    groups = {}
+    
+    def track(task):
+        task.add_done_callback(finished.put_nowait)
+        tasks.append(task)
+        return task
+    
+    dns_tasks = {track(asyncio.create_task(resolve_bounded(h))) for h in hosts}
+    outstanding = len(tasks)
+    
+    async with http_validator.create_session(host_ips) as session:
+        try:
+            while outstanding:
+                task = await finished.get()
+                outstanding -= 1
+                completed += 1
+                
+                if task in dns_tasks:
+                    res = task.result()
+                    if res and wildcard_ips and set(res["ips"]) <= wildcard_ips:
+                        res = None
+                    
+                    if res:
+                        results.append(res)
+                        host_ips[res["host"]] = res["ips"]
+                        track(http_validator.start_check(session, res["host"], res["ips"], groups))
+                        outstanding += 1
+                        yield {"type": "subdomain", "host": res["host"], "ips": res["ips"]}
+                else:
+                    yield http_validator.validation_message(task.result())
+                
+                # Progress covers both stages: every resolution plus one HTTP
+                # check per discovered subdomain
+                total = total_prefixes + len(results)
+                if completed % step == 0 or not outstanding:
+                    yield {
+                        "type": "progress",
+                        "percentage": round(completed * 100 / total, 2),
+                        "completed": completed,
+                        "total": total
+                    }
+        finally:
+            # Don't leave queries or probes running if the consumer went away
+            for task in tasks:
+                task.cancel()
+    
+    elapsed = time.time() - start
+    
+    yield {
+        "type": "complete",
         "count": len(results),
-        "elapsed_time": elapsed
+        "elapsed_time": round(elapsed, 2)
     }
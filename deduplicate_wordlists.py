@@ -27,38 +27,41 @@ def deduplicate_file(filepath):
     
     print(f"Processing: {filepath}")
     
-    # Read all lines
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        lines = f.readlines()
+    # Work on raw bytes: no decode, and bytes.lower() / set lookups on
+    # short bytes objects are cheaper than their str equivalents
+    with open(filepath, 'rb') as f:
+        data = f.read()
     
+    lines = data.splitlines(keepends=True)
     original_count = len(lines)
     
     # Remove duplicates while preserving order
     seen = set()
-    unique_lines = []
+    out = bytearray()
     duplicates_removed = 0
     
     for line in lines:
         # Normalize the line (strip whitespace for comparison)
         normalized = line.strip()
         
-        # Skip empty lines and comments
-        if not normalized or normalized.startswith('#'):
-            unique_lines.append(line)
+        # Keep empty lines and comments as-is
+        if not normalized or normalized.startswith(b'#'):
+            out += line
             continue
         
         # Check if we've seen this line before
-        if normalized.lower() not in seen:
-            seen.add(normalized.lower())
-            unique_lines.append(line)
+        key = normalized.lower()
+        if key not in seen:
+            seen.add(key)
+            out += line
         else:
             duplicates_removed += 1
     
     # Write back to file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.writelines(unique_lines)
+    with open(filepath, 'wb') as f:
+        f.write(out)
     
-    final_count = len(unique_lines)
+    final_count = original_count - duplicates_removed
     
     print(f"  ✓ Original: {original_count} lines")
     print(f"  ✓ Duplicates removed: {duplicates_removed}")
@@ -2,33 +2,86 @@
 # http_validator.py - HTTP/HTTPS validation for discovered subdomains
 
 import asyncio
+import socket
 import aiohttp
+from aiohttp.abc import AbstractResolver
 from typing import List, Dict, Optional
 
+# Short fixed User-Agent instead of aiohttp's default, sent on every probe
+USER_AGENT = "recon/1.0"
 
-async def fetch_status(session: aiohttp.ClientSession, url: str) -> Optional[int]:
+
+class CachedResolver(AbstractResolver):
+    """
+    aiohttp resolver that answers from IPs already found by the DNS phase
+    
+    Hosts missing from the mapping (e.g. redirect targets) fall back to
+    aiohttp's default resolver.
+    
+    Args:
+        mapping: Dict of hostname -> list of IPv4 addresses
+    """
+    
+    def __init__(self, mapping: Dict[str, List[str]]):
+        self._mapping = mapping
+        self._fallback = aiohttp.DefaultResolver()
+    
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_INET) -> List[Dict]:
+        ips = self._mapping.get(host)
+        if not ips:
+            return await self._fallback.resolve(host, port, family)
+        return [
+            {
+                "hostname": host,
+                "host": ip,
+                "port": port,
+                "family": socket.AF_INET,
+                "proto": 0,
+                "flags": 0
+            }
+            for ip in ips
+        ]
+    
+    async def close(self) -> None:
+        await self._fallback.close()
+
+
+async def fetch_status(session: aiohttp.ClientSession, url: str,
+                       headers: Optional[Dict[str, str]] = None) -> Optional[int]:
     """
     Fetch HTTP status code for a URL
     
     Args:
         session: aiohttp ClientSession
         url: URL to check
+        headers: Optional extra request headers (e.g. Host)
         
     Returns:
         HTTP status code or None if request fails
     """
     try:
-        async with session.get(url, timeout=5) as resp:
-            return resp.status
-    except:
+        # Only the status matters; HEAD skips the body download
+        async with session.head(url, timeout=5, allow_redirects=False, headers=headers) as resp:
+            status = resp.status
+        
+        if status == 405:
+            # HEAD not allowed; ask for a single byte instead of the whole body
+            range_headers = {**(headers or {}), "Range": "bytes=0-0"}
+            async with session.get(url, timeout=5, allow_redirects=False, headers=range_headers) as resp:
+                status = resp.status
+        
+        return status
+    except (aiohttp.ClientError, asyncio.TimeoutError):
         return None
 
 
-async def check_http(subdomain: str, ips: List[str]) -> Dict:
+async def check_http(session: aiohttp.ClientSession, subdomain: str, ips: List[str]) -> Dict:
     """
     Check HTTP/HTTPS availability for a subdomain
     
     Args:
+        session: Shared aiohttp ClientSession
         subdomain: Subdomain to check
         ips: List of IP addresses from DNS resolution
         
@@ -37,19 +90,15 @@ async def check_http(subdomain: str, ips: List[str]) -> Dict:
     """
     urls = [f"http://{subdomain}", f"https://{subdomain}"]
 
-    timeout = aiohttp.ClientTimeout(total=6)
-    connector = aiohttp.TCPConnector(ssl=False)
-
-    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-        for url in urls:
-            status = await fetch_status(session, url)
-            if status:
-                return {
-                    "subdomain": subdomain,
-                    "url": url,
-                    "status": status,
-                    "ips": ips
-                }
+    for url in urls:
+        status = await fetch_status(session, url)
+        if status:
+            return {
+                "subdomain": subdomain,
+                "url": url,
+                "status": status,
+                "ips": ips
+            }
 
     return {
         "subdomain": subdomain,
@@ -59,77 +108,117 @@ async def check_http(subdomain: str, ips: List[str]) -> Dict:
     }
 
 
-async def validate_subdomains(subdomain_results: List[Dict], 
-                             validation_callback=None,
-                             progress_callback=None) -> Dict:
+async def check_alias(session: aiohttp.ClientSession, subdomain: str, ips: List[str],
+                      representative: "asyncio.Task") -> Dict:
     """
-    Validate HTTP/HTTPS availability for a list of subdomains
+    Check a subdomain that resolves to the same IPs as an already-probed one
+    
+    If the representative answered over plain HTTP, the alias is probed at
+    the shared IP with its name in the Host header, so every alias rides the
+    same pooled connection. Anything else gets a full check_http(): a failed
+    representative may only have timed out or been refused for its own
+    name, and pooled HTTPS connections are not keyed by SNI name, so reusing
+    one would probe the alias under another vhost's TLS name.
     
     Args:
-        subdomain_results: List of dicts with 'host' and 'ips' keys
-        validation_callback: Optional callback function called for each validated subdomain
-        progress_callback: Optional callback for progress updates (percentage, completed, total)
+        session: Shared aiohttp ClientSession
+        subdomain: Subdomain to check
+        ips: List of IP addresses from DNS resolution
+        representative: Task running check_http() for the first host with these IPs
         
     Returns:
-        Dict with 'live_web_services' and 'dns_only' arrays
+        Dict with subdomain, url, status, and ips
     """
-    total = len(subdomain_results)
-    if total == 0:
-        return {"live_web_services": [], "dns_only": []}
-    
-    # Create tasks for all subdomains
-    tasks = []
-    for result in subdomain_results:
-        host = result["host"]
-        ips = result["ips"]
-        tasks.append(check_http(host, ips))
-    
-    # Process results as they complete (real-time streaming)
-    live_web_services = []
-    dns_only = []
-    completed = 0
-    last_reported_percentage = 45  # Start from 50% (DNS was 0-50%)
-    
-    # Use as_completed to process results as soon as they're ready
-    for coro in asyncio.as_completed(tasks):
-        result = await coro
-        completed += 1
-        
-        # Calculate progress: 50% + (completed/total * 50%)
-        # This makes HTTP validation go from 50% to 100%
-        http_percentage = 50 + (completed / total) * 50
+    rep = await asyncio.shield(representative)
+    if not rep["status"] or not rep["url"].startswith("http://"):
+        return await check_http(session, subdomain, ips)
+    
+    status = await fetch_status(session, f"http://{min(ips)}/", headers={"Host": subdomain})
+    if not status:
+        # This vhost behaves differently from its neighbours; probe it fully
+        return await check_http(session, subdomain, ips)
+    
+    return {
+        "subdomain": subdomain,
+        "url": f"http://{subdomain}",
+        "status": status,
+        "ips": ips
+    }
+
+
+def start_check(session: aiohttp.ClientSession, subdomain: str, ips: List[str],
+                groups: Dict[frozenset, "asyncio.Task"]) -> "asyncio.Task":
+    """
+    Schedule the HTTP check for a subdomain, deduplicated by IP set
+    
+    The first subdomain seen for an IP set gets a full check_http() and
+    becomes the group's representative; later ones go through check_alias().
+    
+    Args:
+        session: Shared aiohttp ClientSession
+        subdomain: Subdomain to check
+        ips: List of IP addresses from DNS resolution
+        groups: Dict of frozenset(ips) -> representative task, shared per run
         
-        # Report progress every 5% or at completion
-        if progress_callback and (http_percentage >= last_reported_percentage + 5 or completed == total):
-            progress_callback(http_percentage, completed, total)
-            last_reported_percentage = http_percentage
+    Returns:
+        Task resolving to a check_http()-style result dict
+    """
+    key = frozenset(ips)
+    representative = groups.get(key)
+    if representative is None:
+        task = groups[key] = asyncio.create_task(check_http(session, subdomain, ips))
+        return task
+    return asyncio.create_task(check_alias(session, subdomain, ips, representative))
+
+
+def create_session(host_ips: Dict[str, List[str]]) -> aiohttp.ClientSession:
+    """
+    Create the shared probe session for one validation run
+    
+    One session for the whole run lets aiohttp reuse pooled connections, and
+    its CachedResolver connects straight to the IPs the DNS phase found.
+    
+    Args:
+        host_ips: Dict of hostname -> IPs; may keep growing while the session is open
         
-        if result["status"]:
-            # Has web service - send immediately
-            live_web_services.append(result)
-            if validation_callback:
-                validation_callback({
-                    "type": "http_validated",
-                    "subdomain": result["subdomain"],
-                    "url": result["url"],
-                    "status": result["status"],
-                    "ips": result["ips"]
-                })
-        else:
-            # DNS only, no web service - send immediately
-            dns_only.append({
-                "subdomain": result["subdomain"],
-                "ips": result["ips"]
-            })
-            if validation_callback:
-                validation_callback({
-                    "type": "dns_only",
-                    "subdomain": result["subdomain"],
-                    "ips": result["ips"]
-                })
+    Returns:
+        aiohttp ClientSession (use it as an async context manager)
+    """
+    connector = aiohttp.TCPConnector(
+        resolver=CachedResolver(host_ips),
+        ssl=False,
+        limit=500,
+        limit_per_host=0,
+        ttl_dns_cache=300,
+        use_dns_cache=True
+    )
+    return aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=6),
+        connector=connector,
+        headers={"User-Agent": USER_AGENT}
+    )
+
+
+def validation_message(result: Dict) -> Dict:
+    """
+    Convert a check_http() result into a typed stream message
     
+    Args:
+        result: Dict returned by check_http()
+        
+    Returns:
+        "http_validated" message for live web services, "dns_only" otherwise
+    """
+    if result["status"]:
+        return {
+            "type": "http_validated",
+            "subdomain": result["subdomain"],
+            "url": result["url"],
+            "status": result["status"],
+            "ips": result["ips"]
+        }
     return {
-        "live_web_services": live_web_services,
-        "dns_only": dns_only
+        "type": "dns_only",
+        "subdomain": result["subdomain"],
+        "ips": result["ips"]
     }
-
@@ -1,13 +1,56 @@
 import json
 import nmap
+import asyncio
+import ipaddress
+import dns.asyncresolver
+import dns.exception
 import time
-import sys
+import re
 import os # Import os for environment check (optional but good practice)
+import shlex
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+try:
+    import orjson # Faster JSON parsing/serialization when installed
+except ImportError:
+    orjson = None
 
 # Constants for file names
 WORDLIST_FILE = "subs.json"
+RESULTS_STREAM_FILE = "scan_results.jsonl" # written incrementally during the scan
 OUTPUT_FILE = "scan_results.json"
 
+# Nmap batching: one Nmap run per SCAN_BATCH_SIZE addresses. Targets are resolved
+# before scanning, so Nmap runs with -n -Pn (no DNS, no host discovery).
+# -sV -sC only runs in a second pass against the ports found open.
+SCAN_BATCH_SIZE = 64
+# Batches scanned concurrently. Each Nmap run already probes 64 hosts in
+# parallel, so keep this low enough not to saturate the network link.
+SCAN_WORKERS = 4
+# DNS lookups in flight at once while resolving the targets
+DNS_CONCURRENCY = 200
+# SYN scan needs raw sockets (root); otherwise fall back to a full TCP connect scan
+SCAN_TYPE = '-sS' if hasattr(os, 'geteuid') and os.geteuid() == 0 else '-sT'
+PORT_SCAN_ARGS = f'-n -Pn {SCAN_TYPE} -T4 --top-ports 100 --max-retries 1 --host-timeout 60s --min-hostgroup 64 --min-parallelism 64'
+SERVICE_SCAN_ARGS = f'-n -Pn {SCAN_TYPE} -sV -sC -T4 --host-timeout 60s'
+
+# Hostname or IPv4 target: 63-char labels, 253 chars total, no leading hyphen.
+# Bare numbers (which Nmap would misread) and wildcards are rejected.
+HOSTNAME_RE = re.compile(r'(?=.{1,253}$)(?!-)(?!\d+$)[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63})*')
+
+# Keywords in script output that flag a port as possibly vulnerable
+VULN_RE = re.compile(r'vulnerable|cve|exploit|unsupported', re.IGNORECASE)
+
+def dump_json_line(data):
+    """Serialize data to one line of UTF-8 JSON bytes, using orjson when available."""
+    if orjson:
+        return orjson.dumps(data) + b'\n'
+    return json.dumps(data, ensure_ascii=False).encode('utf-8') + b'\n'
+
 def load_subdomains(filename):
     """Load the list of subdomains from a JSON file."""
     try:
@@ -15,26 +58,23 @@ def load_subdomains(filename):
             print(f"❌ Error: Wordlist file not found: {filename}")
             return []
             
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(filename, 'rb') as f:
+            data = (orjson or json).loads(f.read())
             
             # Use data.get() for safe access to 'subs'
             subs_list = data.get("subs", [])
             
             if isinstance(subs_list, list):
-                # Critical Correction: Force conversion to string and filter out any empty strings
-                cleaned_subs = []
-                for sub in subs_list:
-                    # Explicitly convert to string and strip whitespace
-                    target = str(sub).strip()
-                    
-                    # Ensure the converted string is not empty and is not just a number (which might cause the error)
-                    # We accept targets that look like valid domain names
-                    if target and (not target.isdigit() or len(target) > 3): 
-                        cleaned_subs.append(target)
-                    elif target.isdigit():
-                         print(f"⚠️ Warning: Skipping numeric target '{target}' in JSON file.")
-                
+                # Critical Correction: Force conversion to string and keep only entries that look like hostnames,
+                # once each (order preserved)
+                cleaned_subs = list(dict.fromkeys(
+                    target for target in (str(sub).strip().lower() for sub in subs_list) if HOSTNAME_RE.fullmatch(target)
+                ))
+
+                skipped = len(subs_list) - len(cleaned_subs)
+                if skipped:
+                    print(f"⚠️ Warning: Skipped {skipped} duplicate, empty, numeric or invalid targets in JSON file.")
+
                 return cleaned_subs
             else:
                 print(f"❌ Error: 'subs' key is not a list in {filename}")
@@ -47,106 +87,235 @@ def load_subdomains(filename):
         print(f"❌ An unexpected error occurred during file loading: {e}")
         return []
 
-def scan_subdomains(subdomains):
+def build_port_entry(port, port_data):
+    """Build the JSON entry for one open TCP port from Nmap's port data."""
+    # Extract Nmap Script Output for Vulns/CVEs
+    script_output = port_data.get('script', {})
+
+    warnings = []
+    # Check for common keywords in script output
+    for script_name, output in script_output.items():
+        output = str(output)
+        if VULN_RE.search(output):
+            warnings.append(f"[{script_name}: {output.splitlines()[0][:50]}...]")
+    vulnerability_warning = "".join(warnings)
+
+    return {
+        "port_id": port,
+        "protocol": "tcp",
+        "state": port_data['state'],
+        "service": port_data.get('name', ''),
+        "product": port_data.get('product', ''),
+        "version": port_data.get('version', ''),
+        "vulnerability_warning": vulnerability_warning if vulnerability_warning else "None Detected by Default Scripts",
+        "nmap_script_output": script_output 
+    }
+
+def parse_host(elem):
+    """Reduce one Nmap XML <host> element to its address, state and open TCP ports."""
+    address = elem.find("address[@addrtype='ipv4']")
+    if address is None:
+        address = elem.find('address')
+    status = elem.find('status')
+
+    open_ports = {}
+    for port in elem.iterfind('ports/port'):
+        state = port.find('state')
+        if port.get('protocol') != 'tcp' or state is None or state.get('state') != 'open':
+            continue
+        service = port.find('service')
+        service = service.attrib if service is not None else {}
+        open_ports[int(port.get('portid'))] = {
+            'state': 'open',
+            'name': service.get('name', ''),
+            'product': service.get('product', ''),
+            'version': service.get('version', ''),
+            'script': {script.get('id'): script.get('output', '') for script in port.iterfind('script')}
+        }
+
+    return {
+        'addr': address.get('addr'),
+        'state': status.get('state') if status is not None else 'unknown',
+        'tcp': open_ports
+    }
+
+def run_nmap(hosts, arguments):
+    """
+    Run Nmap with XML output on stdout and yield one parsed host at a time.
+
+    Each <host> element is cleared as soon as it is parsed, so memory holds one
+    host's XML at a time instead of the whole scan output. Stderr goes to a
+    temporary file rather than a pipe, so a chatty scan cannot fill the pipe
+    and stall Nmap while stdout is still being read.
+    """
+    command = ['nmap', '-oX', '-', *shlex.split(arguments), *hosts]
+    parse_error = None
+
+    with tempfile.TemporaryFile() as stderr_file:
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr_file) as proc:
+            try:
+                for _, elem in ET.iterparse(proc.stdout):
+                    if elem.tag == 'host':
+                        yield parse_host(elem)
+                        elem.clear()
+            except ET.ParseError as e:
+                parse_error = e
+
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode('utf-8', 'ignore').strip()
+
+    if proc.returncode != 0 or parse_error:
+        raise nmap.PortScannerError(stderr or f"Unreadable Nmap XML output: {parse_error}")
+
+async def resolve_targets(targets):
+    """Resolve every target to its first IPv4 address; targets that do not resolve map to None."""
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = 2
+    semaphore = asyncio.Semaphore(DNS_CONCURRENCY)
+
+    async def resolve(target):
+        try:
+            return target, str(ipaddress.IPv4Address(target))
+        except ValueError:
+            pass
+        try:
+            async with semaphore:
+                answers = await resolver.resolve(target, 'A')
+            return target, answers[0].to_text()
+        except dns.exception.DNSException:
+            return target, None
+
+    return dict(await asyncio.gather(*(resolve(target) for target in targets)))
+
+def scan_batch(batch):
+    """
+    Scan one batch of IP addresses with a single Nmap invocation per pass.
+
+    The first pass only discovers open ports across the whole batch. The expensive
+    -sV -sC pass then runs once, restricted to the hosts and ports found open.
+    Returns the parsed hosts keyed by address.
+    """
+    # 1. Port discovery for every address of the batch at once
+    hosts = {host['addr']: host for host in run_nmap(batch, PORT_SCAN_ARGS)}
+
+    # 2. Service/script scan only where something is listening
+    live_hosts = [addr for addr, host in hosts.items() if host['tcp']]
+    if live_hosts:
+        port_list = ",".join(str(port) for port in sorted({port for addr in live_hosts for port in hosts[addr]['tcp']}))
+        for host in run_nmap(live_hosts, f"{SERVICE_SCAN_ARGS} -p {port_list}"):
+            # Merge service details into the discovery record, so ports that pass 2
+            # missed (e.g. --host-timeout) keep their pass-1 entry
+            if host['addr'] in hosts:
+                hosts[host['addr']]['tcp'].update(host['tcp'])
+
+    return hosts
+
+def scan_subdomains(subdomains, output_filename):
     """
     Execute a comprehensive Nmap scan (Service Version Detection and Default Scripting) 
     for vulnerability and version detection.
+
+    Targets are resolved up front and Nmap only sees the distinct IP addresses,
+    with its own DNS disabled. Addresses are scanned in batches of SCAN_BATCH_SIZE
+    per Nmap run, which amortizes process start-up and NSE initialization across
+    the batch. Up to SCAN_WORKERS batches run at the same time.
+
+    Results are written to output_filename as JSON Lines as soon as their batch
+    finishes, so memory stays flat and a crash keeps everything scanned so far.
+    Returns the number of results written.
     """
     try:
-        nm = nmap.PortScanner()
+        nmap.PortScanner()
     except nmap.PortScannerError as e:
         print(f"❌ Nmap Initialization Error: {e}")
         print("Please ensure Nmap is installed and accessible in your system's PATH.")
-        return []
+        return 0
 
-    results = []
-    total_subs = len(subdomains)
+    # FINAL GUARD: Ensure every target is a non-empty string before proceeding
+    targets = [target.strip() for target in subdomains if isinstance(target, str) and target.strip()]
+    total_subs = len(targets)
 
     if total_subs == 0:
         print("No valid subdomains to scan. Exiting.")
-        return results
+        return 0
 
-    print(f"🔍 Starting scan on {total_subs} subdomains...")
+    print(f"🔍 Resolving {total_subs} subdomains...")
+    ip_by_target = asyncio.run(resolve_targets(targets))
+    # Subdomains sharing an address are scanned once
+    targets_by_ip = {}
+    for target, ip in ip_by_target.items():
+        targets_by_ip.setdefault(ip, []).append(target)
+    ips = [ip for ip in targets_by_ip if ip]
+
+    print(f"🔍 Starting scan on {len(ips)} addresses...")
     print("-" * 50)
 
-    for i, target in enumerate(subdomains):
-        
-        # FINAL GUARD: Ensure the target is a string and not empty before proceeding
-        if not isinstance(target, str) or not target.strip():
-            print(f"\n⚠️ Skipping invalid or empty target at index {i}.")
-            continue
-            
-        target = target.strip() # Re-strip just in case
+    batches = [ips[i:i + SCAN_BATCH_SIZE] for i in range(0, len(ips), SCAN_BATCH_SIZE)]
+    written = 0
 
-        try:
-            # Calculate progress
-            progress_percent = ((i + 1) / total_subs) * 100
-            
-            # 1. Display progress (%)
-            progress_message = f"[{i + 1}/{total_subs}] Scanning: {target} | Progress: {progress_percent:.2f}%"
-            sys.stdout.write(f"\r{progress_message}{' ' * (80 - len(progress_message))}") 
-            sys.stdout.flush()
-
-            # 2. Execute Nmap scan
-            # Arguments: -sV (Version Detection), -sC (Default Scripts - includes vulns check), -T4, -p 1-1000
-            nm.scan(hosts=target, arguments='-sV -sC -T4 -p 1-1000')
-
-            # 3. Process the results
-            scan_data = {
-                "target": target,
-                "host_state": nm[target].state() if target in nm else "unknown",
-                "open_ports": []
-            }
-
-            if target in nm.all_hosts() and 'tcp' in nm[target]:
-                for port, port_data in nm[target]['tcp'].items():
-                    if port_data['state'] == 'open':
-                        
-                        # Extract Nmap Script Output for Vulns/CVEs
-                        script_output = port_data.get('script', {})
-                        
-                        vulnerability_warning = ""
-                        # Check for common keywords in script output
-                        for script_name, output in script_output.items():
-                            if any(kw in str(output).lower() for kw in ["vulnerable", "cve", "exploit", "unsupported"]):
-                                vulnerability_warning += f"[{script_name}: {str(output).splitlines()[0][:50]}...]" 
-                        
-                        port_entry = {
-                            "port_id": port,
-                            "protocol": "tcp",
-                            "state": port_data['state'],
-                            "service": port_data.get('name', ''),
-                            "product": port_data.get('product', ''),
-                            "version": port_data.get('version', ''),
-                            "vulnerability_warning": vulnerability_warning if vulnerability_warning else "None Detected by Default Scripts",
-                            "nmap_script_output": script_output 
-                        }
-                        scan_data["open_ports"].append(port_entry)
-            
-            results.append(scan_data)
-
-        except nmap.PortScannerError as e:
-            # Nmap specific errors (e.g., failed to resolve host, or internal library error)
-            print(f"\n⚠️ Nmap Scanner Error on {target}: {e}")
-            results.append({"target": target, "error": f"Nmap Scanner Error: {e}"})
-        except Exception as e:
-            # General errors
-            print(f"\n⚠️ Failed to scan {target}: {e}")
-            results.append({"target": target, "error": str(e)})
-            
-    # Clear the progress line and show completion message
-    sys.stdout.write(f"\r{' ' * 80}\r") 
+    with open(output_filename, 'wb') as output:
+        def emit(entries):
+            nonlocal written
+            for entry in entries:
+                output.write(dump_json_line(entry))
+                written += 1
+            output.flush()
+
+        # Targets that did not resolve are never scanned
+        emit({"target": target, "ip": None, "host_state": "unknown", "open_ports": []} for target in targets_by_ip.pop(None, []))
+
+        # tqdm redraws at a fixed rate, however fast batches complete
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor, tqdm(total=len(ips), unit='host', desc='Scanning') as progress:
+            futures = {executor.submit(scan_batch, batch): batch for batch in batches}
+
+            for future in as_completed(futures):
+                batch = futures[future]
+
+                try:
+                    hosts = future.result()
+
+                except nmap.PortScannerError as e:
+                    # Nmap specific errors (e.g., invalid arguments, or internal library error)
+                    tqdm.write(f"⚠️ Nmap Scanner Error on batch starting at {batch[0]}: {e}")
+                    emit({"target": target, "ip": ip, "error": f"Nmap Scanner Error: {e}"} for ip in batch for target in targets_by_ip[ip])
+                except Exception as e:
+                    # General errors
+                    tqdm.write(f"⚠️ Failed to scan batch starting at {batch[0]}: {e}")
+                    emit({"target": target, "ip": ip, "error": str(e)} for ip in batch for target in targets_by_ip[ip])
+
+                else:
+                    # Map the scanned addresses back to the subdomain names
+                    emit(
+                        {
+                            "target": target,
+                            "ip": ip,
+                            "host_state": hosts[ip]['state'],
+                            "open_ports": [build_port_entry(port, port_data) for port, port_data in hosts[ip]['tcp'].items()]
+                        } if ip in hosts else {"target": target, "ip": ip, "host_state": "unknown", "open_ports": []}
+                        for ip in batch for target in targets_by_ip[ip]
+                    )
+
+                progress.update(len(batch))
+
+    # Show completion message
     print("=" * 50)
     print("✅ Scan Complete!")
     print("=" * 50)
-    return results
+    return written
 
-def save_results(filename, data):
-    """Save the results to a JSON file."""
+def jsonl_to_json(jsonl_filename, json_filename):
+    """Convert the streamed JSON Lines results into a single JSON array, one entry per line."""
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        print(f"💾 Results saved successfully to: {filename}")
+        with open(jsonl_filename, 'rb') as src, open(json_filename, 'wb') as dst:
+            dst.write(b'[')
+            separator = b'\n'
+            for line in src:
+                line = line.strip()
+                if line:
+                    dst.write(separator + line)
+                    separator = b',\n'
+            dst.write(b'\n]\n')
+        print(f"💾 Results saved successfully to: {json_filename}")
     except Exception as e:
         print(f"❌ Failed to save results: {e}")
 
@@ -156,8 +325,8 @@ if __name__ == "__main__":
     
     # 2. Start scanning automatically
     if subdomains_list:
-        scan_results = scan_subdomains(subdomains_list)
+        scanned = scan_subdomains(subdomains_list, RESULTS_STREAM_FILE)
         
-        # 3. Save the results
-        if scan_results:
-            save_results(OUTPUT_FILE, scan_results)
\ No newline at end of file
+        # 3. Collect the streamed results into a single JSON array
+        if scanned:
+            jsonl_to_json(RESULTS_STREAM_FILE, OUTPUT_FILE)
\ No newline at end of file
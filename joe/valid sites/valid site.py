@@ -1,9 +1,11 @@
-import dns.resolver
-import concurrent.futures
+import aiodns
+import pycares
+import time
 import asyncio
 import aiohttp
 import json
 import os
+from wildcard_dns import HOSTNAME_RE, DNS_CACHE, NEGATIVE_TTL, TIMEOUT_TTL, cache_dns, parent_zones, wildcard_probe_name, is_wildcard
 from colorama import Fore, Style, init
 init(autoreset=True)
 
@@ -21,8 +23,12 @@ def load_subdomains():
             data = json.load(f)
 
         if "subs" in data:
-            print(f"[+] Loaded {len(data['subs'])} subdomains")
-            return data["subs"]
+            # Drop malformed entries and duplicates before any network I/O
+            subs = list(dict.fromkeys(
+                sub for sub in (str(s).strip().lower() for s in data["subs"]) if HOSTNAME_RE.fullmatch(sub)
+            ))
+            print(f"[+] Loaded {len(subs)} subdomains ({len(data['subs']) - len(subs)} duplicate or invalid skipped)")
+            return subs
         else:
             print("[-] JSON missing 'subs' key!")
             return []
@@ -34,37 +40,83 @@ def load_subdomains():
 # ------------------------------------
 # DNS Resolve
 # ------------------------------------
-def resolve_domain(sub):
-    resolver = dns.resolver.Resolver()
-    resolver.timeout = 2
-    resolver.lifetime = 2
+# Lookups in flight at once on the c-ares channel
+DNS_CONCURRENCY = 200
+
+async def resolve_domain(resolver, semaphore, sub, use_cache=True):
+    now = time.monotonic()
+    cached = DNS_CACHE.get(sub) if use_cache else None
+    if cached and cached[2] > now:
+        return sub, cached[0], cached[1]
+
     try:
-        answers = resolver.resolve(sub, "A")
-        return sub, True, [a.to_text() for a in answers]
-    except:
-        return sub, False, []
+        async with semaphore:
+            result = await resolver.query_dns(sub, "A")
+        ips = [r.data.addr for r in result.answer if isinstance(r.data, pycares.ARecordData)]
+        if ips:
+            entry = (True, ips, now + min((r.ttl for r in result.answer), default=NEGATIVE_TTL))
+        else:
+            # No A record left (e.g. a bare CNAME chain): same as NODATA
+            entry = (False, [], now + NEGATIVE_TTL)
+    except aiodns.error.DNSError as e:
+        if e.args[0] in (aiodns.error.ARES_ENOTFOUND, aiodns.error.ARES_ENODATA):
+            entry = (False, [], now + NEGATIVE_TTL)
+        elif e.args[0] == aiodns.error.ARES_ETIMEOUT:
+            # Often transient, so retried sooner than a definite negative answer
+            entry = (False, [], now + TIMEOUT_TTL)
+        else:
+            return sub, False, []
+
+    if use_cache:
+        cache_dns(sub, entry)
+    return sub, entry[0], entry[1]
 
 # ------------------------------------
 # HTTP Check
 # ------------------------------------
+# Built once and shared by every probe; connect=2 gives up quickly on dead hosts
+REQ_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+
 async def fetch_status(session, url):
     try:
-        async with session.get(url, timeout=5) as resp:
-            return resp.status
-    except:
+        # Only the status matters; HEAD skips the body download
+        async with session.head(url, timeout=REQ_TIMEOUT, allow_redirects=False) as resp:
+            status = resp.status
+
+        if status == 405:
+            # HEAD not allowed; ask for a single byte instead of the whole body
+            async with session.get(url, timeout=REQ_TIMEOUT, allow_redirects=False, headers={"Range": "bytes=0-0"}) as resp:
+                status = resp.status
+
+        return status
+    except (aiohttp.ClientError, asyncio.TimeoutError):
         return None
 
-async def check_http(sub):
-    urls = [f"http://{sub}", f"https://{sub}"]
+# HTTP checks running at once, and resolved subdomains allowed to queue up for them
+HTTP_WORKERS = 100
+HTTP_QUEUE_SIZE = 1000
+
+def create_session():
+    # One session for every check, so the connection pool and DNS cache are shared
+    connector = aiohttp.TCPConnector(ssl=False, limit=200, limit_per_host=2, ttl_dns_cache=300, use_dns_cache=True)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=6))
 
-    timeout = aiohttp.ClientTimeout(total=6)
-    connector = aiohttp.TCPConnector(ssl=False)
+async def check_http(session, sub):
+    urls = [f"http://{sub}", f"https://{sub}"]
 
-    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-        for url in urls:
-            status = await fetch_status(session, url)
-            if status:
-                return {"subdomain": sub, "url": url, "status": status}
+    # Probe both schemes at once and keep whichever answers first
+    probes = {asyncio.create_task(fetch_status(session, url)): url for url in urls}
+    pending = set(probes)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for probe in done:
+                status = probe.result()
+                if status:
+                    return {"subdomain": sub, "url": probes[probe], "status": status}
+    finally:
+        for probe in pending:
+            probe.cancel()
 
     return {"subdomain": sub, "url": None, "status": None}
 
@@ -87,17 +139,47 @@ async def main():
     if not subs:
         return
 
-    print("\n[+] Resolving DNS...")
-    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as exe:
-        results = list(exe.map(resolve_domain, subs))
-
-    alive = [r[0] for r in results if r[1]]
-    print(f"[+] Alive DNS: {len(alive)}")
-
-    print("\n[+] Checking HTTP/HTTPS...")
-    tasks = [check_http(sub) for sub in alive]
-    http_results = await asyncio.gather(*tasks)
+    print("\n[+] Resolving DNS and checking HTTP/HTTPS...")
+    resolver = aiodns.DNSResolver(timeout=2, tries=1)
+    semaphore = asyncio.Semaphore(DNS_CONCURRENCY)
+    # Resolved subdomains wait here for a free HTTP worker; the bound holds back DNS
+    queue = asyncio.Queue(maxsize=HTTP_QUEUE_SIZE)
+    alive = []
+    http_results = []
+    wildcard_ips = {}
+
+    async def resolve_and_queue(sub):
+        sub, ok, ips = await resolve_domain(resolver, semaphore, sub)
+        if ok and not is_wildcard(sub, ips, wildcard_ips):
+            alive.append(sub)
+            await queue.put(sub)
+
+    async def resolve_all():
+        # Probe each parent zone once up front, so wildcard answers never reach HTTP
+        zones = parent_zones(subs)
+        probes = await asyncio.gather(*(resolve_domain(resolver, semaphore, wildcard_probe_name(zone), use_cache=False) for zone in zones))
+        wildcard_ips.update((zone, set(ips)) for zone, (_, ok, ips) in zip(zones, probes) if ok)
+        if wildcard_ips:
+            print(f"[!] Wildcard DNS detected for: {', '.join(wildcard_ips)}")
+
+        await asyncio.gather(*(resolve_and_queue(sub) for sub in subs))
+        print(f"[+] Alive DNS: {len(alive)}")
+        for _ in range(HTTP_WORKERS):
+            await queue.put(None)
+
+    async def http_worker(session):
+        while (sub := await queue.get()) is not None:
+            http_results.append(await check_http(session, sub))
 
+    try:
+        async with create_session() as session:
+            await asyncio.gather(resolve_all(), *(http_worker(session) for _ in range(HTTP_WORKERS)))
+    finally:
+        await resolver.close()
+
+    # Workers finish in any order; write the results in input order
+    order = {sub: i for i, sub in enumerate(subs)}
+    http_results.sort(key=lambda r: order[r["subdomain"]])
     live_results = [r for r in http_results if r["status"]]
     print(f"[+] Live Web Services: {len(live_results)}")
 
@@ -1,13 +1,36 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+import dns.asyncresolver
+import dns.exception
 import dns.resolver
-import concurrent.futures
+import time
 import asyncio
+from wildcard_dns import HOSTNAME_RE, DNS_CACHE, NEGATIVE_TTL, TIMEOUT_TTL, cache_dns, parent_zones, wildcard_probe_name, is_wildcard
 import aiohttp
+from contextlib import asynccontextmanager
 from typing import List, Optional
 
-app = FastAPI(title="Subdomain Validator API")
+# ------------------------------------
+# Shared HTTP Session
+# ------------------------------------
+# Created on first use and shared by every request, so they all reuse the same connection pool
+http_session: Optional[aiohttp.ClientSession] = None
+
+def get_http_session():
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(ssl=False, limit=200, limit_per_host=2, ttl_dns_cache=300, use_dns_cache=True)
+        http_session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=6))
+    return http_session
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    if http_session is not None:
+        await http_session.close()
+
+app = FastAPI(title="Subdomain Validator API", lifespan=lifespan)
 
 # CORS middleware for React frontend
 app.add_middleware(
@@ -45,37 +68,76 @@ class ValidationResponse(BaseModel):
 # ------------------------------------
 # DNS Resolve
 # ------------------------------------
-def resolve_domain(sub: str):
-    resolver = dns.resolver.Resolver()
-    resolver.timeout = 2
-    resolver.lifetime = 2
+# One async resolver for every lookup, backed by dnspython's answer cache
+RESOLVER = dns.asyncresolver.Resolver()
+RESOLVER.timeout = 2
+RESOLVER.lifetime = 2
+RESOLVER.cache = dns.resolver.LRUCache(10000)
+
+# Lookups in flight at once, shared by all requests
+DNS_CONCURRENCY = 500
+dns_semaphore = asyncio.Semaphore(DNS_CONCURRENCY)
+
+async def resolve_domain(sub: str, use_cache: bool = True):
+    now = time.monotonic()
+    cached = DNS_CACHE.get(sub) if use_cache else None
+    if cached and cached[2] > now:
+        return sub, cached[0], cached[1]
+
     try:
-        answers = resolver.resolve(sub, "A")
-        return sub, True, [a.to_text() for a in answers]
-    except:
+        async with dns_semaphore:
+            answers = await RESOLVER.resolve(sub, "A")
+        entry = (True, [a.to_text() for a in answers], now + answers.rrset.ttl)
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        entry = (False, [], now + NEGATIVE_TTL)
+    except dns.exception.Timeout:
+        # Often transient, so retried sooner than a definite negative answer
+        entry = (False, [], now + TIMEOUT_TTL)
+    except dns.exception.DNSException:
+        # SERVFAIL from every nameserver, malformed names, ...
         return sub, False, []
 
+    if use_cache:
+        cache_dns(sub, entry)
+    return sub, entry[0], entry[1]
+
 # ------------------------------------
 # HTTP Check
 # ------------------------------------
+# Built once and shared by every probe; connect=2 gives up quickly on dead hosts
+REQ_TIMEOUT = aiohttp.ClientTimeout(total=5, connect=2)
+
 async def fetch_status(session, url: str):
     try:
-        async with session.get(url, timeout=5) as resp:
-            return resp.status
-    except:
+        # Only the status matters; HEAD skips the body download
+        async with session.head(url, timeout=REQ_TIMEOUT, allow_redirects=False) as resp:
+            status = resp.status
+
+        if status == 405:
+            # HEAD not allowed; ask for a single byte instead of the whole body
+            async with session.get(url, timeout=REQ_TIMEOUT, allow_redirects=False, headers={"Range": "bytes=0-0"}) as resp:
+                status = resp.status
+
+        return status
+    except (aiohttp.ClientError, asyncio.TimeoutError):
         return None
 
-async def check_http(sub: str, ips: List[str]):
+async def check_http(session: aiohttp.ClientSession, sub: str, ips: List[str]):
     urls = [f"http://{sub}", f"https://{sub}"]
 
-    timeout = aiohttp.ClientTimeout(total=6)
-    connector = aiohttp.TCPConnector(ssl=False)
-
-    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-        for url in urls:
-            status = await fetch_status(session, url)
-            if status:
-                return {"subdomain": sub, "url": url, "status": status, "ips": ips}
+    # Probe both schemes at once and keep whichever answers first
+    probes = {asyncio.create_task(fetch_status(session, url)): url for url in urls}
+    pending = set(probes)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for probe in done:
+                status = probe.result()
+                if status:
+                    return {"subdomain": sub, "url": probes[probe], "status": status, "ips": ips}
+    finally:
+        for probe in pending:
+            probe.cancel()
 
     return {"subdomain": sub, "url": None, "status": None, "ips": ips}
 
@@ -86,17 +148,39 @@ async def process_subdomains(subs: List[str]):
     if not subs:
         raise HTTPException(status_code=400, detail="No subdomains provided")
 
-    # DNS Resolution
-    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as exe:
-        results = list(exe.map(resolve_domain, subs))
+    # Drop malformed entries and duplicates before any network I/O
+    unique_subs = list(dict.fromkeys(sub for sub in (s.strip().lower() for s in subs) if HOSTNAME_RE.fullmatch(sub)))
 
-    # Create a mapping of subdomain -> IPs
-    dns_map = {r[0]: r[2] for r in results if r[1]}
-    alive = list(dns_map.keys())
+    # DNS Resolution, with one wildcard probe per parent zone running alongside
+    zones = parent_zones(unique_subs)
+    wildcard_probes = asyncio.gather(*(resolve_domain(wildcard_probe_name(zone), use_cache=False) for zone in zones))
+    dns_tasks = [asyncio.create_task(resolve_domain(sub)) for sub in unique_subs]
+    session = get_http_session()
+    dns_map = {}
+    http_tasks = {}
 
-    # HTTP/HTTPS Check
-    tasks = [check_http(sub, dns_map[sub]) for sub in alive]
-    http_results = await asyncio.gather(*tasks)
+    try:
+        wildcard_ips = {zone: set(r[2]) for zone, r in zip(zones, await wildcard_probes) if r[1]}
+
+        # Map subdomain -> IPs, leaving out wildcard answers, and start each
+        # HTTP/HTTPS check as soon as its subdomain resolves
+        for resolution in asyncio.as_completed(dns_tasks):
+            sub, ok, ips = await resolution
+            if ok and not is_wildcard(sub, ips, wildcard_ips):
+                dns_map[sub] = ips
+                http_tasks[sub] = asyncio.create_task(check_http(session, sub, ips))
+
+        await asyncio.gather(*http_tasks.values())
+    finally:
+        # Don't leave lookups or probes running on the shared session if the
+        # request failed or the client went away
+        wildcard_probes.cancel()
+        for task in [*dns_tasks, *http_tasks.values()]:
+            task.cancel()
+
+    # Report everything in input order
+    alive = [sub for sub in unique_subs if sub in dns_map]
+    http_results = [http_tasks[sub].result() for sub in alive]
 
     # Separate into two categories
     live_web_services = [r for r in http_results if r["status"]]
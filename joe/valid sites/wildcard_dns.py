@@ -0,0 +1,41 @@
+# wildcard_dns.py - DNS helpers shared by valid site.py and valid_site_api.py
+import re
+import uuid
+
+# 63-char labels, 253 chars total, no leading hyphen; wildcards are rejected
+HOSTNAME_RE = re.compile(r'(?=.{1,253}$)(?!-)[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63})*')
+
+# ------------------------------------
+# DNS Cache
+# ------------------------------------
+# sub -> (ok, ips, expiry); negative answers are kept for NEGATIVE_TTL seconds, timeouts for TIMEOUT_TTL.
+# Bounded FIFO: once full, the oldest inserted entry is evicted (hits do not reorder it).
+DNS_CACHE = {}
+DNS_CACHE_SIZE = 50000
+NEGATIVE_TTL = 3600
+TIMEOUT_TTL = 60
+
+def cache_dns(sub, entry):
+    """Store a (ok, ips, expiry) entry for sub, evicting the oldest one once full."""
+    DNS_CACHE.pop(sub, None)
+    DNS_CACHE[sub] = entry
+    if len(DNS_CACHE) > DNS_CACHE_SIZE:
+        del DNS_CACHE[next(iter(DNS_CACHE))]
+
+# ------------------------------------
+# Wildcard DNS
+# ------------------------------------
+
+
+def parent_zones(subs):
+    """Distinct parent zones of the given subdomains, in first-seen order."""
+    return list(dict.fromkeys(sub.partition(".")[2] for sub in subs if "." in sub))
+
+def wildcard_probe_name(zone):
+    # A random label that cannot exist unless the zone answers for everything
+    return f"wildcard-probe-{uuid.uuid4().hex}.{zone}"
+
+def is_wildcard(sub, ips, wildcard_ips):
+    """True when sub resolved only to its parent zone's wildcard addresses."""
+    zone_ips = wildcard_ips.get(sub.partition(".")[2])
+    return bool(zone_ips) and set(ips) <= zone_ips
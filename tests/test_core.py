@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+import core
+
+
+def test_stream_rejects_zero_threads():
+    async def run():
+        async for _ in core.aenumerate_subdomains_stream("example.com", threads=0):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_wildcard_probes_bypass_the_dns_cache(monkeypatch):
+    names = []
+
+    async def fake_resolve(name, rdtype, **kwargs):
+        names.append(name)
+        return [type("Rdata", (), {"to_text": lambda self: "9.9.9.9"})()]
+
+    monkeypatch.setattr(core._RESOLVER, "resolve", fake_resolve)
+    before = len(core._DNS_CACHE)
+
+    wildcard_ips = asyncio.run(core.adetect_wildcard_ips("example.com", 1.0))
+
+    assert wildcard_ips == {"9.9.9.9"}
+    assert len(names) == 3 and all(name.endswith(".example.com") for name in names)
+    assert len(core._DNS_CACHE) == before
@@ -0,0 +1,34 @@
+from deduplicate_wordlists import deduplicate_file
+
+
+def test_removes_case_insensitive_duplicates_in_order(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_bytes(b"www\nmail\nWWW\n  mail  \napi\n")
+
+    deduplicate_file(str(wordlist))
+
+    assert wordlist.read_bytes() == b"www\nmail\napi\n"
+
+
+def test_keeps_comments_blank_lines_and_line_endings(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_bytes(b"# header\r\nwww\r\n\r\n# header\r\nwww\r\ndev")
+
+    deduplicate_file(str(wordlist))
+
+    assert wordlist.read_bytes() == b"# header\r\nwww\r\n\r\n# header\r\ndev"
+
+
+def test_leaves_non_utf8_bytes_untouched(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_bytes(b"caf\xe9\nCAF\xe9\nwww\n")
+
+    deduplicate_file(str(wordlist))
+
+    assert wordlist.read_bytes() == b"caf\xe9\nwww\n"
+
+
+def test_missing_file_is_skipped(tmp_path):
+    deduplicate_file(str(tmp_path / "missing.txt"))
+
+    assert not (tmp_path / "missing.txt").exists()
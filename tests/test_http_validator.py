@@ -0,0 +1,145 @@
+import asyncio
+
+import http_validator
+from http_validator import start_check, validation_message
+
+
+def test_validation_message_for_live_service():
+    result = {"subdomain": "www.example.com", "url": "https://www.example.com", "status": 301, "ips": ["1.2.3.4"]}
+
+    assert validation_message(result) == {
+        "type": "http_validated",
+        "subdomain": "www.example.com",
+        "url": "https://www.example.com",
+        "status": 301,
+        "ips": ["1.2.3.4"]
+    }
+
+
+def test_validation_message_for_dns_only():
+    result = {"subdomain": "db.example.com", "url": None, "status": None, "ips": ["10.0.0.1"]}
+
+    assert validation_message(result) == {
+        "type": "dns_only",
+        "subdomain": "db.example.com",
+        "ips": ["10.0.0.1"]
+    }
+
+
+def test_start_check_probes_each_ip_set_once(monkeypatch):
+    calls = []
+
+    async def fake_check_http(session, subdomain, ips):
+        calls.append(("full", subdomain))
+        return {"subdomain": subdomain, "url": f"https://{subdomain}", "status": 200, "ips": ips}
+
+    async def fake_check_alias(session, subdomain, ips, representative):
+        rep = await representative
+        calls.append(("alias", subdomain, rep["subdomain"]))
+        return {"subdomain": subdomain, "url": f"https://{subdomain}", "status": 200, "ips": ips}
+
+    monkeypatch.setattr(http_validator, "check_http", fake_check_http)
+    monkeypatch.setattr(http_validator, "check_alias", fake_check_alias)
+
+    async def run():
+        groups = {}
+        tasks = [
+            start_check(None, "a.example.com", ["1.1.1.1", "2.2.2.2"], groups),
+            start_check(None, "b.example.com", ["2.2.2.2", "1.1.1.1"], groups),
+            start_check(None, "c.example.com", ["3.3.3.3"], groups),
+        ]
+        await asyncio.gather(*tasks)
+        return groups
+
+    groups = asyncio.run(run())
+
+    assert set(groups) == {frozenset({"1.1.1.1", "2.2.2.2"}), frozenset({"3.3.3.3"})}
+    assert sorted(calls) == [
+        ("alias", "b.example.com", "a.example.com"),
+        ("full", "a.example.com"),
+        ("full", "c.example.com"),
+    ]
+
+
+def test_cancelled_check_http_sends_no_further_probes():
+    urls = []
+    started = asyncio.Event()
+
+    class FakeResponse:
+        status = 200
+
+        async def __aenter__(self):
+            if len(urls) == 1:
+                # Only the first (http) probe hangs until it is cancelled
+                started.set()
+                await asyncio.sleep(3600)
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeSession:
+        def head(self, url, **kwargs):
+            urls.append(url)
+            return FakeResponse()
+
+    async def run():
+        task = asyncio.create_task(http_validator.check_http(FakeSession(), "www.example.com", ["1.2.3.4"]))
+        await started.wait()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(run())
+    assert urls == ["http://www.example.com"]
+
+
+def run_alias(monkeypatch, rep_result, alias_status=200):
+    probes = []
+
+    async def fake_fetch_status(session, url, headers=None):
+        probes.append((url, headers))
+        return alias_status
+
+    async def fake_check_http(session, subdomain, ips):
+        probes.append(("full", subdomain))
+        return {"subdomain": subdomain, "url": f"https://{subdomain}", "status": 200, "ips": ips}
+
+    monkeypatch.setattr(http_validator, "fetch_status", fake_fetch_status)
+    monkeypatch.setattr(http_validator, "check_http", fake_check_http)
+
+    async def run():
+        representative = asyncio.get_running_loop().create_future()
+        representative.set_result(rep_result)
+        return await http_validator.check_alias(None, "b.example.com", ["1.1.1.1"], representative)
+
+    return asyncio.run(run()), probes
+
+
+def test_check_alias_probes_fully_when_representative_failed(monkeypatch):
+    rep = {"subdomain": "a.example.com", "url": None, "status": None, "ips": ["1.1.1.1"]}
+
+    result, probes = run_alias(monkeypatch, rep)
+
+    assert probes == [("full", "b.example.com")]
+    assert result["status"] == 200
+
+
+def test_check_alias_does_not_share_https_connections(monkeypatch):
+    rep = {"subdomain": "a.example.com", "url": "https://a.example.com", "status": 200, "ips": ["1.1.1.1"]}
+
+    _, probes = run_alias(monkeypatch, rep)
+
+    assert probes == [("full", "b.example.com")]
+
+
+def test_check_alias_reuses_plain_http_with_host_header(monkeypatch):
+    rep = {"subdomain": "a.example.com", "url": "http://a.example.com", "status": 200, "ips": ["1.1.1.1"]}
+
+    result, probes = run_alias(monkeypatch, rep, alias_status=302)
+
+    assert probes == [("http://1.1.1.1/", {"Host": "b.example.com"})]
+    assert result == {"subdomain": "b.example.com", "url": "http://b.example.com", "status": 302, "ips": ["1.1.1.1"]}
@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import xml.etree.ElementTree as ET
+
+MAIN_PATH = os.path.join(os.path.dirname(__file__), "..", "joe", "service_ports", "main.py")
+
+spec = importlib.util.spec_from_file_location("service_ports_main", MAIN_PATH)
+service_ports = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(service_ports)
+
+HOST_XML = """
+<host>
+  <status state="up"/>
+  <address addr="aa:bb:cc:dd:ee:ff" addrtype="mac"/>
+  <address addr="10.0.0.5" addrtype="ipv4"/>
+  <ports>
+    <port protocol="tcp" portid="22">
+      <state state="open"/>
+      <service name="ssh" product="OpenSSH" version="9.6"/>
+    </port>
+    <port protocol="tcp" portid="80">
+      <state state="open"/>
+      <service name="http"/>
+      <script id="http-title" output="Welcome"/>
+    </port>
+    <port protocol="tcp" portid="443">
+      <state state="filtered"/>
+    </port>
+    <port protocol="udp" portid="53">
+      <state state="open"/>
+    </port>
+  </ports>
+</host>
+"""
+
+
+def test_parse_host_keeps_only_open_tcp_ports():
+    host = service_ports.parse_host(ET.fromstring(HOST_XML))
+
+    assert host["addr"] == "10.0.0.5"
+    assert host["state"] == "up"
+    assert host["tcp"] == {
+        22: {"state": "open", "name": "ssh", "product": "OpenSSH", "version": "9.6", "script": {}},
+        80: {"state": "open", "name": "http", "product": "", "version": "", "script": {"http-title": "Welcome"}},
+    }
+
+
+def test_parse_host_without_status_or_ports():
+    host = service_ports.parse_host(ET.fromstring('<host><address addr="10.0.0.6" addrtype="ipv4"/></host>'))
+
+    assert host == {"addr": "10.0.0.6", "state": "unknown", "tcp": {}}
+
+
+def test_load_subdomains_normalizes_filters_and_dedups(tmp_path, capsys):
+    wordlist = tmp_path / "subs.json"
+    wordlist.write_text(
+        '{"subs": ["WWW.example.com", " www.example.com ", "", "12345", "-bad.example.com",'
+        ' "api.example.com", 42, "10.0.0.1", "bad_name.example.com"]}'
+    )
+
+    subs = service_ports.load_subdomains(str(wordlist))
+
+    assert subs == ["www.example.com", "api.example.com", "10.0.0.1"]
+    assert "Skipped 6" in capsys.readouterr().out
+
+
+def test_load_subdomains_rejects_overlong_names(tmp_path):
+    wordlist = tmp_path / "subs.json"
+    wordlist.write_text('{"subs": ["%s.example.com", "%s"]}' % ("a" * 64, ".".join(["a" * 63] * 4 + ["b"])))
+
+    assert service_ports.load_subdomains(str(wordlist)) == []
+
+
+def test_load_subdomains_missing_or_malformed_file(tmp_path):
+    assert service_ports.load_subdomains(str(tmp_path / "missing.json")) == []
+
+    wordlist = tmp_path / "subs.json"
+    wordlist.write_text('{"subs": "www.example.com"}')
+    assert service_ports.load_subdomains(str(wordlist)) == []
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "joe", "valid sites"))
+
+import wildcard_dns
+from wildcard_dns import HOSTNAME_RE, cache_dns, is_wildcard, parent_zones, wildcard_probe_name
+
+
+def test_parent_zones_are_distinct_and_ordered():
+    subs = ["www.example.com", "api.example.com", "a.dev.example.com", "localhost", "b.dev.example.com"]
+
+    assert parent_zones(subs) == ["example.com", "dev.example.com"]
+
+
+def test_wildcard_probe_names_are_random_labels_in_the_zone():
+    first = wildcard_probe_name("example.com")
+    second = wildcard_probe_name("example.com")
+
+    assert first != second
+    assert first.startswith("wildcard-probe-") and first.endswith(".example.com")
+
+
+def test_is_wildcard_only_when_all_ips_match_the_zone_wildcard():
+    wildcard_ips = {"example.com": {"9.9.9.9", "8.8.8.8"}}
+
+    assert is_wildcard("x.example.com", ["9.9.9.9"], wildcard_ips)
+    assert not is_wildcard("x.example.com", ["9.9.9.9", "1.2.3.4"], wildcard_ips)
+    assert not is_wildcard("x.other.com", ["9.9.9.9"], wildcard_ips)
+    assert not is_wildcard("a.x.example.com", ["9.9.9.9"], wildcard_ips)
+
+
+def test_hostname_re_rejects_wildcards_and_bad_labels():
+    assert HOSTNAME_RE.fullmatch("www.example.com")
+    assert not HOSTNAME_RE.fullmatch("*.example.com")
+    assert not HOSTNAME_RE.fullmatch("-www.example.com")
+    assert not HOSTNAME_RE.fullmatch("a" * 64 + ".example.com")
+
+
+def test_cache_dns_evicts_oldest_entry_once_full(monkeypatch):
+    monkeypatch.setattr(wildcard_dns, "DNS_CACHE", {})
+    monkeypatch.setattr(wildcard_dns, "DNS_CACHE_SIZE", 2)
+
+    cache_dns("a.example.com", (True, ["1.1.1.1"], 10))
+    cache_dns("b.example.com", (False, [], 10))
+    cache_dns("a.example.com", (True, ["2.2.2.2"], 20))
+    cache_dns("c.example.com", (False, [], 10))
+
+    assert list(wildcard_dns.DNS_CACHE) == ["a.example.com", "c.example.com"]
+    assert wildcard_dns.DNS_CACHE["a.example.com"] == (True, ["2.2.2.2"], 20)